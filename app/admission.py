@@ -0,0 +1,144 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Tuple
+from app.config import settings
+from app.deadline import DeadlineExceeded
+
+
+class StageOverloaded(Exception):
+    """Raised when a stage has no free slot and its wait queue is full or timed out"""
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(f"{stage} stage is over capacity")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class StageLimiter:
+    """Concurrency limit for one expensive stage with a bounded wait queue"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    @asynccontextmanager
+    async def slot(self, timeout: float = None):
+        """Hold one slot of this stage; queue wait is capped by timeout when given.
+
+        Raises StageOverloaded when the stage is congested, or
+        DeadlineExceeded when the caller's remaining budget ends the wait.
+        """
+        if self.in_flight + self.queued >= self.max_concurrency + self.max_queue:
+            self.rejected_queue_full += 1
+            raise StageOverloaded(self.name, self.retry_after)
+
+        deadline_bound = timeout is not None and timeout < self.queue_timeout
+        self.queued += 1
+        try:
+            await asyncio.wait_for(
+                self._semaphore.acquire(),
+                timeout=timeout if deadline_bound else self.queue_timeout
+            )
+        except asyncio.TimeoutError:
+            if deadline_bound:
+                raise DeadlineExceeded(self.name)
+            self.rejected_timeout += 1
+            raise StageOverloaded(self.name, self.retry_after)
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def snapshot(self) -> Dict:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queued,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'rejected_queue_full': self.rejected_queue_full,
+            'rejected_timeout': self.rejected_timeout
+        }
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec: float, capacity: int):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> Tuple[bool, int]:
+        """Returns (allowed, retry_after_seconds)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0
+        return False, max(1, math.ceil((1 - self.tokens) / self.rate))
+
+
+class AdmissionController:
+    MAX_TRACKED_KEYS = 4096
+
+    def __init__(self):
+        self.stages = {
+            "ocr": StageLimiter("ocr", settings.OCR_MAX_CONCURRENCY, settings.OCR_MAX_QUEUE, settings.QUEUE_TIMEOUT_SECONDS),
+            "ai": StageLimiter("ai", settings.AI_MAX_CONCURRENCY, settings.AI_MAX_QUEUE, settings.QUEUE_TIMEOUT_SECONDS),
+            "scrape": StageLimiter("scrape", settings.SCRAPE_MAX_CONCURRENCY, settings.SCRAPE_MAX_QUEUE, settings.QUEUE_TIMEOUT_SECONDS)
+        }
+        self._buckets = OrderedDict()  # client id -> TokenBucket
+        self.quota_rejections = 0
+
+    def stage(self, name: str) -> StageLimiter:
+        return self.stages[name]
+
+    def check_quota(self, client_id: str) -> Tuple[bool, int]:
+        """Consume one token from the client's bucket (LRU-bounded per client)"""
+        key = client_id or "anonymous"
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(settings.RATE_LIMIT_PER_MINUTE / 60, settings.RATE_LIMIT_BURST)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.MAX_TRACKED_KEYS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        allowed, retry_after = bucket.try_acquire()
+        if not allowed:
+            self.quota_rejections += 1
+        return allowed, retry_after
+
+    def snapshot(self) -> Dict:
+        return {
+            'stages': {name: limiter.snapshot() for name, limiter in self.stages.items()},
+            'quota': {
+                'tracked_keys': len(self._buckets),
+                'rejections': self.quota_rejections
+            }
+        }
+
+admission = AdmissionController()
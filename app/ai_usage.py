@@ -1,22 +1,27 @@
 import openai
+from typing import Optional
 from fastapi import HTTPException
 from app.config import settings
 
 token = settings.AIPIPE_TOKEN
+ALLOWED_MODELS = settings.ALLOWED_MODELS
 
 
 class AIProxy:
     def __init__(self):
-        self.client = openai.OpenAI(
+        # Async client so cancelling a speculative call aborts the HTTP request
+        self.client = openai.AsyncOpenAI(
             base_url=settings.AIPIPE_BASE_URL,
             api_key=settings.AIPIPE_TOKEN
         )
         self.min_confidence = 0.65  # Use AI if local score < 65%
 
-    async def get_fallback_answer(self, question: str, context: str = "") -> dict:
-        """Fallback to AI Pipe when local results are poor"""
+    async def get_fallback_answer(self, question: str, context: str = "", timeout: Optional[float] = None) -> dict:
+        """Fallback to AI Pipe when local results are poor, bounded by timeout seconds"""
+        request_timeout = openai.NOT_GIVEN if timeout is None else timeout
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
+                timeout=request_timeout,
                 model=ALLOWED_MODELS["default"],
                 messages=[
                     {
@@ -34,10 +39,14 @@ class AIProxy:
                 "content": response.choices[0].message.content,
                 "cost": response.usage.total_tokens / 1000 * 0.002  # Estimate cost
             }
+        except openai.APITimeoutError as e:
+            # Out of time budget; the cheaper model would not finish either
+            raise TimeoutError("AI fallback timed out") from e
         except Exception as e:
             # Fallback to cheaper model if budget exhausted
             try:
-                response = self.client.chat.completions.create(
+                response = await self.client.chat.completions.create(
+                    timeout=request_timeout,
                     model=ALLOWED_MODELS["fallback"],
                     messages=[{"role": "user", "content": question}],
                     temperature=0.3
@@ -47,6 +56,8 @@ class AIProxy:
                     "model": ALLOWED_MODELS["fallback"],
                     "content": response.choices[0].message.content
                 }
+            except openai.APITimeoutError as e:
+                raise TimeoutError("AI fallback timed out") from e
             except Exception as e:
                 raise HTTPException(
                     status_code=429,
@@ -11,6 +11,15 @@ DATE_RANGES = {
 DISCOURSE_URL = "https://discourse.onlinedegree.iitm.ac.in"
 DOCSIFY_BASE = "https://your-docsify-site.com/"  # Replace with actual URL
 
+# Near-duplicate detection at ingest (MinHash + LSH banding)
+DEDUP_SETTINGS = {
+    "num_perm": 128,       # MinHash signature length (must equal bands * rows)
+    "bands": 16,           # LSH bands; 16 x 8 rows puts the S-curve knee near 0.7
+    "threshold": 0.8,      # Estimated Jaccard needed to merge a candidate pair
+    "shingle_size": 3,     # Word n-gram size used for shingling
+    "seed": 42
+}
+
 # Keep your existing Settings class
 class Settings(BaseSettings):
     AIPIPE_TOKEN: str = os.getenv("AIPIPE_TOKEN", "")
@@ -20,6 +29,27 @@ class Settings(BaseSettings):
         "fallback": "openai/gpt-3.5-turbo"
     }
 
+    # Admission control: per-stage concurrency with bounded wait queues
+    OCR_MAX_CONCURRENCY: int = 2
+    OCR_MAX_QUEUE: int = 4
+    AI_MAX_CONCURRENCY: int = 4
+    AI_MAX_QUEUE: int = 8
+    SCRAPE_MAX_CONCURRENCY: int = 8
+    SCRAPE_MAX_QUEUE: int = 32
+    QUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    # End-to-end request deadline (clients may ask for less via X-Request-Timeout)
+    REQUEST_TIMEOUT_SECONDS: float = 20.0
+    MAX_REQUEST_TIMEOUT_SECONDS: float = 60.0
+
+    # Start the AI fallback speculatively when the early local confidence
+    # (0-1) is below this; keep it at or above ai_proxy.min_confidence
+    SPECULATION_THRESHOLD: float = 0.75
+
+    # Per-client token bucket quotas (API key + client address)
+    RATE_LIMIT_PER_MINUTE: float = 60.0
+    RATE_LIMIT_BURST: int = 10
+
     class Config:
         env_file = ".env"
 
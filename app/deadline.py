@@ -0,0 +1,54 @@
+import asyncio
+import math
+import time
+from typing import Optional, Awaitable, Any
+from app.config import settings
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage runs out of the request's time budget"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """Per-request time budget handed down to every expensive stage"""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_header(cls, requested: Optional[float] = None) -> "Deadline":
+        """Clamp a client-requested budget to the configured maximum"""
+        if requested is None or not math.isfinite(requested) or requested <= 0:
+            return cls(settings.REQUEST_TIMEOUT_SECONDS)
+        return cls(min(requested, settings.MAX_REQUEST_TIMEOUT_SECONDS))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str):
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+    def timeout(self, cap: float) -> float:
+        """Per-call timeout: the smaller of a stage's own cap and the remaining budget"""
+        return min(cap, self.remaining())
+
+    async def run(self, stage: str, awaitable: Awaitable, grace: float = 0.0) -> Any:
+        """Await a stage, cancelling it once the remaining budget (plus grace) is spent"""
+        if self.expired:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(stage)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining() + grace)
+        except TimeoutError:
+            raise DeadlineExceeded(stage)
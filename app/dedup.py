@@ -0,0 +1,142 @@
+import hashlib
+import random
+import re
+import time
+from collections import defaultdict
+from typing import List, Dict, Tuple, Set
+from .config import DEDUP_SETTINGS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, banded for LSH lookups"""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 3, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> Set[int]:
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            grams = [" ".join(words)] if words else []
+        else:
+            grams = [
+                " ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            ]
+        return {
+            int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "little")
+            for g in grams
+        }
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        shingles = self.shingles(text)
+        if not shingles:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._perms
+        )
+
+    def band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def _post_text(post: Dict) -> str:
+    return f"{post.get('title', '')} {post.get('content', post.get('text', ''))}"
+
+
+def _canonical_rank(post: Dict) -> Tuple:
+    # Accepted answers first, then the most complete excerpt, then the oldest post
+    return (
+        not post.get("is_solution", False),
+        -len(post.get("content", post.get("text", ""))),
+        post.get("date", "")
+    )
+
+
+def deduplicate_posts(posts: List[Dict], hasher: MinHasher = None) -> Tuple[List[Dict], Dict]:
+    """Collapse near-duplicate posts into one canonical post per cluster.
+
+    Returns (canonical_posts, stats). Each canonical post gets a
+    ``duplicates`` list holding the URLs of the posts merged into it.
+    """
+    start = time.perf_counter()
+    hasher = hasher or MinHasher(
+        num_perm=DEDUP_SETTINGS["num_perm"],
+        bands=DEDUP_SETTINGS["bands"],
+        shingle_size=DEDUP_SETTINGS["shingle_size"],
+        seed=DEDUP_SETTINGS["seed"]
+    )
+    threshold = DEDUP_SETTINGS["threshold"]
+
+    signatures = [hasher.signature(_post_text(post)) for post in posts]
+
+    # Cluster candidate pairs that share at least one LSH bucket. Clusters
+    # only merge when every cross pair clears the threshold, so A~B and B~C
+    # does not drag C into A's cluster unless C is also close to A.
+    root_of = list(range(len(posts)))
+    clusters = {idx: [idx] for idx in range(len(posts))}
+
+    def all_close(left: List[int], right: List[int]) -> bool:
+        return all(
+            MinHasher.similarity(signatures[a], signatures[b]) >= threshold
+            for a in left for b in right
+        )
+
+    buckets = defaultdict(list)
+    for idx, sig in enumerate(signatures):
+        for key in hasher.band_keys(sig):
+            buckets[key].append(idx)
+
+    checked = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                root_i, root_j = root_of[i], root_of[j]
+                if root_i == root_j or MinHasher.similarity(signatures[i], signatures[j]) < threshold:
+                    continue
+                if not all_close(clusters[root_i], clusters[root_j]):
+                    continue
+                for m in clusters.pop(root_j):
+                    root_of[m] = root_i
+                    clusters[root_i].append(m)
+
+    canonical = []
+    for root in sorted(clusters):
+        members = sorted(clusters[root], key=lambda i: _canonical_rank(posts[i]))
+        keeper = dict(posts[members[0]])
+        keeper["duplicates"] = [posts[i]["url"] for i in members[1:]]
+        canonical.append(keeper)
+
+    duration = time.perf_counter() - start
+    stats = {
+        "input": len(posts),
+        "kept": len(canonical),
+        "candidate_pairs": len(checked),
+        "duration": duration
+    }
+    return canonical, stats
@@ -2,11 +2,17 @@ import pytesseract
 from PIL import Image
 import io
 import base64
+from typing import Optional
 
-def extract_text_from_image(image_base64: str) -> str:
+def extract_text_from_image(image_base64: str, timeout: Optional[float] = None) -> str:
     """Extracts text from base64 encoded image with error handling"""
     try:
         img = Image.open(io.BytesIO(base64.b64decode(image_base64)))
-        return pytesseract.image_to_string(img)
+        # pytesseract treats timeout=0 as "no limit"
+        return pytesseract.image_to_string(img, timeout=timeout or 0)
+    except RuntimeError as e:
+        if "timeout" in str(e).lower():
+            raise TimeoutError("OCR timed out") from e
+        raise ValueError(f"Image processing failed: {str(e)}")
     except Exception as e:
         raise ValueError(f"Image processing failed: {str(e)}")
\ No newline at end of file
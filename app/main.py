@@ -1,16 +1,15 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import  CORSMiddleware
 from pydantic import BaseModel, Field, field_validator, StringConstraints
 from typing import Optional, Annotated
 import time
 from datetime import datetime
-from fuzzywuzzy import fuzz
 import os
 import logging
-from .scraper import get_discourse_posts, get_docsify_content
-from .image_utils import extract_text_from_image
-from .storage import KnowledgeStorage
-from .ai_usage import ai_proxy
+from .scraper import storage  # same instance the scrapers record ingest metrics on
+from .admission import admission, StageOverloaded
+from .deadline import Deadline
+from .planner import ExecutionPlanner, speculation_stats
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +17,27 @@ logger = logging.getLogger(__name__)
 async def verify_api_key(api_key: str = Header(default=None)):
     if api_key != os.getenv("API_KEY"):
         raise HTTPException(status_code=403, detail="Invalid API key")
+    return api_key
+
+# Per-client token bucket quota. Every client shares the one API_KEY,
+# so buckets are keyed on the key plus the caller's address.
+async def enforce_quota(request: Request, api_key: str = Depends(verify_api_key)):
+    client_host = request.client.host if request.client else "unknown"
+    allowed, retry_after = admission.check_quota(f"{api_key or 'anonymous'}:{client_host}")
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(retry_after)}
+        )
+    return api_key
+
+def overloaded(e: StageOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"Service busy ({e.stage}). Try again later.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
 
 class SystemMetrics:
     _instance = None
@@ -62,7 +82,6 @@ class SystemMetrics:
         }
 
 app = FastAPI()
-storage = KnowledgeStorage()
 
 app.add_middleware(
     CORSMiddleware,
@@ -99,7 +118,9 @@ class QuestionRequest(BaseModel):
 def get_metrics():
     return {
         "storage_metrics": storage.get_performance_stats(),
-        "system_metrics": SystemMetrics.collect()
+        "system_metrics": SystemMetrics.collect(),
+        "admission": admission.snapshot(),
+        "speculation": speculation_stats.snapshot()
     }
 
 @app.post(
@@ -109,75 +130,41 @@ def get_metrics():
     tags=["Q&A"],
     responses={
         400: {"description": "Invalid image format"},
+        403: {"description": "Invalid API key"},
         422: {"description": "Validation error"},
-        500: {"description": "Internal server error"}
+        429: {"description": "Per-key rate limit exceeded"},
+        500: {"description": "Internal server error"},
+        503: {"description": "Service over capacity"}
     }
 )
 async def answer_question(
     request: QuestionRequest,
-    api_key: str = Header(None)
+    api_key: str = Depends(enforce_quota),
+    x_request_timeout: Optional[float] = Header(None)
 ):
     start_time = time.perf_counter()
-    cache_used = False
+    deadline = Deadline.from_header(x_request_timeout)
     try:
-        query = request.question
-        if request.image:
-            query += "\nIMAGE CONTEXT:\n" + extract_text_from_image(request.image)
-        
-        discourse_data, from_cache1 = get_discourse_posts()
-        docsify_data, from_cache2 = get_docsify_content()
-        cache_used = from_cache1 or from_cache2
-
-        results = []
-        for post in discourse_data:
-            score = max(
-                fuzz.token_sort_ratio(query.lower(), post["title"].lower()),
-                fuzz.token_sort_ratio(query.lower(), post["content"].lower())
-            )
-            if score > 65 or post["is_solution"]:
-                results.append({
-                    "source": "discourse",
-                    "score": score,
-                    "content": post["content"],
-                    "url": post["url"],
-                    "is_solution": post["is_solution"],
-                    "date": post.get("date", datetime.now().isoformat())
-                })
-        
-        for doc in docsify_data:
-            score = fuzz.token_sort_ratio(query.lower(), doc["text"].lower())
-            if score > 65:
-                results.append({
-                    "source": "docsify",
-                    "score": score,
-                    "content": doc["text"],
-                    "url": doc["url"],
-                    "date": doc.get("date", datetime.now().isoformat())
-                })
-
-        sorted_results = sorted(results, key=lambda x: (-x["score"], x["date"]))
-
-        if not results or max(r["score"] for r in results) < ai_proxy.min_confidence:
-            try:
-                ai_response = await ai_proxy.get_fallback_answer(
-                    question=request.question,
-                    context="\n".join([r["content"] for r in results[:2]])
-                )
-                results.append(ai_response)
-                sorted_results = sorted(results, key=lambda x: (-x["score"], x["date"]))
-            except HTTPException as e:
-                logger.warning(f"AI fallback failed: {e.detail}")
+        plan = await ExecutionPlanner(request.question, request.image, deadline).run()
         
         return {
             "answer": "Combined results",
-            "results": sorted_results,
+            "results": plan["results"],
             "metrics": {
                 "processing_time_ms": (time.perf_counter() - start_time) * 1000,
                 "sources_queried": ["discourse", "docsify"],
-                "cache_used": cache_used
+                "cache_used": plan["cache_used"],
+                "deadline_ms": deadline.budget * 1000,
+                "partial": bool(plan["skipped_stages"]),
+                "skipped_stages": plan["skipped_stages"],
+                "speculation": plan["speculation"]
             }
         }
         
+    except StageOverloaded as e:
+        raise overloaded(e)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
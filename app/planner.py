@@ -0,0 +1,259 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple, Callable
+from fastapi import HTTPException
+from fuzzywuzzy import fuzz
+from .scraper import get_cached_posts, scrape_discourse_posts, scrape_docsify_content
+from .image_utils import extract_text_from_image
+from .ai_usage import ai_proxy
+from .admission import admission, StageOverloaded
+from .deadline import Deadline, DeadlineExceeded
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculationStats:
+    """Outcome counters for speculative AI fallbacks, used to tune SPECULATION_THRESHOLD"""
+
+    def __init__(self):
+        self.outcomes = {
+            'hit': 0,      # speculated and the final score still needed AI
+            'wasted': 0,   # speculated but not needed; the request is aborted on
+                           # cancel, but tokens already processed may still be billed
+            'kept': 0,     # speculated, not needed, but already answered; the
+                           # paid answer is returned alongside the local results
+            'miss': 0,     # did not speculate but the final score needed AI
+            'avoided': 0   # did not speculate and AI was not needed
+        }
+
+    def record(self, outcome: str):
+        self.outcomes[outcome] += 1
+
+    def snapshot(self) -> Dict:
+        started = self.outcomes['hit'] + self.outcomes['wasted'] + self.outcomes['kept']
+        return {
+            'threshold': settings.SPECULATION_THRESHOLD,
+            'started': started,
+            **self.outcomes,
+            'hit_rate': self.outcomes['hit'] / max(1, started),
+            'waste_rate': self.outcomes['wasted'] / max(1, started),
+            'miss_rate': self.outcomes['miss'] / max(1, self.outcomes['hit'] + self.outcomes['miss'])
+        }
+
+speculation_stats = SpeculationStats()
+
+
+def score_posts(query: str, source: str, posts: List[Dict]) -> List[Dict]:
+    """Fuzzy-match the query against one source's posts"""
+    results = []
+    if source == "docsify":
+        for doc in posts:
+            score = fuzz.token_sort_ratio(query.lower(), doc["text"].lower())
+            if score > 65:
+                results.append({
+                    "source": "docsify",
+                    "score": score,
+                    "content": doc["text"],
+                    "url": doc["url"],
+                    "date": doc.get("date", datetime.now().isoformat())
+                })
+        return results
+
+    for post in posts:
+        score = max(
+            fuzz.token_sort_ratio(query.lower(), post["title"].lower()),
+            fuzz.token_sort_ratio(query.lower(), post["content"].lower())
+        )
+        if score > 65 or post["is_solution"]:
+            results.append({
+                "source": "discourse",
+                "score": score,
+                "content": post["content"],
+                "url": post["url"],
+                "is_solution": post["is_solution"],
+                "date": post.get("date", datetime.now().isoformat())
+            })
+    return results
+
+
+def confidence(results: List[Dict]) -> float:
+    """Best local match as a 0-1 confidence, comparable to ai_proxy.min_confidence"""
+    return max((r["score"] for r in results), default=0) / 100
+
+
+# source -> (task, progress) of the cache-filling scrape for that source
+_background_scrapes: Dict[str, Tuple[asyncio.Task, List[Dict]]] = {}
+
+
+async def _fill_cache(scrape: Callable, progress: List[Dict]) -> Tuple[List[Dict], bool]:
+    # Only the network scrape takes a slot; cache hits never queue behind it
+    async with admission.stage("scrape").slot():
+        return await asyncio.to_thread(scrape, None, progress)
+
+
+def _log_cache_fill_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background scrape failed: {task.exception()}")
+
+
+def _start_cache_fill(source: str, scrape: Callable) -> Tuple[asyncio.Task, List[Dict]]:
+    """Single-flight: concurrent cache misses for a source share one scrape"""
+    job = _background_scrapes.get(source)
+    if job is None or job[0].done():
+        progress = []
+        task = asyncio.create_task(_fill_cache(scrape, progress))
+        task.add_done_callback(_log_cache_fill_failure)
+        job = _background_scrapes[source] = (task, progress)
+    return job
+
+
+async def load_corpus(source: str, scrape: Callable, deadline: Deadline) -> Tuple[List[Dict], bool, bool]:
+    """Serve a source from cache, or from a background scrape within the deadline.
+
+    The scrape runs outside the request deadline so a cold cache still gets
+    filled; a request that runs out of budget answers from what has been
+    fetched so far. Returns (posts, from_cache, complete).
+    """
+    cached = await deadline.run("scrape", asyncio.to_thread(get_cached_posts, source))
+    if cached is not None:
+        return cached, True, True
+
+    task, progress = _start_cache_fill(source, scrape)
+    if deadline.expired:
+        return list(progress), False, False
+    try:
+        # Shielded so a request running out of budget never cancels the shared scrape
+        posts, complete = await deadline.run("scrape", asyncio.shield(task))
+        return posts, False, complete
+    except DeadlineExceeded:
+        return list(progress), False, False
+
+
+class ExecutionPlanner:
+    """Runs OCR and corpus retrieval concurrently and speculates on the AI fallback"""
+
+    def __init__(self, question: str, image: Optional[str], deadline: Deadline):
+        self.question = question
+        self.image = image
+        self.deadline = deadline
+        self.skipped_stages = {}
+        self.speculation = None
+        self._scores = {}  # (source, query) -> scored results
+
+    async def _ocr(self) -> str:
+        self.deadline.check("ocr")
+        async with admission.stage("ocr").slot(timeout=self.deadline.remaining()):
+            return await self.deadline.run(
+                "ocr",
+                asyncio.to_thread(extract_text_from_image, self.image, self.deadline.remaining())
+            )
+
+    async def _ai(self, results: List[Dict]) -> dict:
+        async with admission.stage("ai").slot(timeout=self.deadline.remaining()):
+            return await self.deadline.run("ai", ai_proxy.get_fallback_answer(
+                question=self.question,
+                context="\n".join([r["content"] for r in results[:2]]),
+                timeout=self.deadline.remaining()
+            ))
+
+    async def _score(self, query: str, corpus: Dict) -> List[Dict]:
+        """Score each loaded source once per query, off the event loop, best matches first"""
+        results = []
+        for source, (posts, *_) in corpus.items():
+            key = (source, query)
+            if key not in self._scores:
+                self._scores[key] = await asyncio.to_thread(score_posts, query, source, posts)
+            results.extend(self._scores[key])
+        return sorted(results, key=lambda x: (-x["score"], x["date"]))
+
+    async def run(self) -> Dict:
+        tasks = {
+            asyncio.create_task(load_corpus("discourse", scrape_discourse_posts, self.deadline)): "discourse",
+            asyncio.create_task(load_corpus("docsify", scrape_docsify_content, self.deadline)): "docsify"
+        }
+        if self.image:
+            tasks[asyncio.create_task(self._ocr())] = "ocr"
+
+        corpus = {}  # source -> (posts, from_cache, complete), filled as loads finish
+        query = self.question
+        ai_task = None
+        could_speculate = False
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        value = task.result()
+                    except DeadlineExceeded as e:
+                        self.skipped_stages[e.stage] = "deadline"
+                        continue
+                    if tasks[task] == "ocr":
+                        query = self.question + "\nIMAGE CONTEXT:\n" + value
+                    else:
+                        corpus[tasks[task]] = value
+                        if not value[2]:
+                            # Scraper ran out of budget and returned what it had fetched
+                            self.skipped_stages.setdefault("scrape", "partial")
+
+                # Early estimate from whatever has arrived while other stages still run
+                loaded = any(posts for posts, *_ in corpus.values())
+                if pending and ai_task is None and loaded and not self.deadline.expired:
+                    could_speculate = True
+                    early = await self._score(query, corpus)
+                    if confidence(early) < settings.SPECULATION_THRESHOLD:
+                        ai_task = asyncio.create_task(self._ai(early))
+
+            # Only sources not yet scored, or a query changed by OCR, cost anything here
+            results = await self._score(query, corpus)
+            needs_ai = confidence(results) < ai_proxy.min_confidence
+
+            if ai_task is not None:
+                if needs_ai:
+                    self.speculation = "hit"
+                elif ai_task.done() and not ai_task.cancelled() and ai_task.exception() is None:
+                    # Already paid for; cancelling now would save nothing
+                    self.speculation = "kept"
+                    results.append(ai_task.result())
+                    results.sort(key=lambda x: (-x.get("score", 0), x.get("date", "")))
+                else:
+                    self.speculation = "wasted"
+                    ai_task.cancel()
+            elif could_speculate:
+                self.speculation = "miss" if needs_ai else "avoided"
+            if self.speculation:
+                speculation_stats.record(self.speculation)
+
+            if needs_ai:
+                if ai_task is None and self.deadline.expired:
+                    self.skipped_stages["ai"] = "deadline"
+                else:
+                    try:
+                        results.append(await (ai_task or self._ai(results)))
+                        results.sort(key=lambda x: (-x.get("score", 0), x.get("date", "")))
+                    except StageOverloaded as e:
+                        # Degrade to local-only results instead of queueing behind the LLM
+                        self.skipped_stages[e.stage] = "overloaded"
+                        logger.warning(f"AI fallback shed: {e}")
+                    except DeadlineExceeded as e:
+                        self.skipped_stages[e.stage] = "deadline"
+                        logger.warning(f"AI fallback cut off: {e}")
+                    except HTTPException as e:
+                        logger.warning(f"AI fallback failed: {e.detail}")
+
+            return {
+                "results": results,
+                "cache_used": any(from_cache for _, from_cache, _ in corpus.values()),
+                "skipped_stages": self.skipped_stages,
+                "speculation": self.speculation
+            }
+        finally:
+            for task in [*tasks, ai_task]:
+                if task is None:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # mark retrieved so unused failures are not logged
@@ -2,44 +2,68 @@ from datetime import datetime
 import time
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from .storage import KnowledgeStorage
+from .dedup import deduplicate_posts
+from .deadline import Deadline, DeadlineExceeded
 from .config import DATE_RANGES, DISCOURSE_URL, DOCSIFY_BASE
 
 storage = KnowledgeStorage()
 
-def rate_limited_get(url: str, retries: int = 3) -> requests.Response:
-    """Make HTTP requests with rate limiting and retries"""
+def rate_limited_get(url: str, retries: int = 3, deadline: Optional[Deadline] = None) -> requests.Response:
+    """Make HTTP requests with rate limiting and retries, within the request deadline"""
     for attempt in range(retries):
         try:
-            time.sleep(0.5)  # Rate limiting
-            response = requests.get(url, timeout=10)
+            time.sleep(0.5 if deadline is None else deadline.timeout(0.5))  # Rate limiting
+            timeout = 10
+            if deadline is not None:
+                deadline.check("scrape")
+                timeout = deadline.timeout(10)
+            response = requests.get(url, timeout=timeout)
             response.raise_for_status()
             return response
         except (requests.RequestException, requests.Timeout) as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded("scrape")
             if attempt == retries - 1:
                 raise
-            time.sleep(1 * (attempt + 1))
+            backoff = 1 * (attempt + 1)
+            if deadline is not None and deadline.remaining() <= backoff:
+                raise DeadlineExceeded("scrape")
+            time.sleep(backoff)
 
-def get_discourse_posts() -> Tuple[List[Dict], bool]:
-    """Fetch Discourse posts with caching"""
+def get_cached_posts(source: str) -> Optional[List[Dict]]:
+    """Cached posts from memory or the database, or None on a cache miss"""
     # First check in-memory cache
-    cached_data = storage.get_cached_data("discourse")
+    cached_data = storage.get_cached_data(source)
     if cached_data:
-        return cached_data, True
+        return cached_data
     
     # Then check database cache
-    db_posts, from_db_cache = storage.get_recent_posts("discourse")
+    db_posts, from_db_cache = storage.get_recent_posts(source)
     if from_db_cache:
-        storage.set_cached_data("discourse", db_posts)
-        return db_posts, True
+        storage.set_cached_data(source, db_posts)
+        return db_posts
+    return None
+
+def get_discourse_posts(deadline: Optional[Deadline] = None) -> Tuple[List[Dict], bool]:
+    """Fetch Discourse posts with caching"""
+    cached_data = get_cached_posts("discourse")
+    if cached_data is not None:
+        return cached_data, True
+    return scrape_discourse_posts(deadline)[0], False
+
+def scrape_discourse_posts(deadline: Optional[Deadline] = None, progress: Optional[List[Dict]] = None) -> Tuple[List[Dict], bool]:
+    """Fresh Discourse scrape returning (posts, complete); partial fetches are not persisted.
 
-    # Fresh scrape if no cache
-    posts = []
+    Posts are appended to ``progress`` as they arrive so callers can read a
+    partial corpus while the scrape is still running.
+    """
+    posts = [] if progress is None else progress
     page = 0
     while True:
         try:
-            response = rate_limited_get(f"{DISCOURSE_URL}?page={page}&order=created")
+            response = rate_limited_get(f"{DISCOURSE_URL}?page={page}&order=created", deadline=deadline)
             data = response.json()
             topics = data.get("topic_list", {}).get("topics", [])
             if not topics:
@@ -57,29 +81,29 @@ def get_discourse_posts() -> Tuple[List[Dict], bool]:
                         "is_solution": topic.get("has_accepted_answer", False)
                     })
             page += 1
+        except DeadlineExceeded:
+            # No time left to dedup; the partial corpus is only used for this request
+            return posts, False
         except Exception as e:
             break
     
     if posts:
+        posts, dedup_stats = deduplicate_posts(posts)
+        storage.record_dedup(dedup_stats)
         storage.save_posts(posts)
         storage.set_cached_data("discourse", posts)
-    return posts, False
+    return posts, True
 
-def get_docsify_content() -> Tuple[List[Dict], bool]:
+def get_docsify_content(deadline: Optional[Deadline] = None) -> Tuple[List[Dict], bool]:
     """Fetch Docsify content with caching"""
-    # First check in-memory cache
-    cached_data = storage.get_cached_data("docsify")
-    if cached_data:
+    cached_data = get_cached_posts("docsify")
+    if cached_data is not None:
         return cached_data, True
-    
-    # Then check database cache
-    db_content, from_db_cache = storage.get_recent_posts("docsify")
-    if from_db_cache:
-        storage.set_cached_data("docsify", db_content)
-        return db_content, True
+    return scrape_docsify_content(deadline)[0], False
 
-    # Fresh scrape if no cache
-    content = []
+def scrape_docsify_content(deadline: Optional[Deadline] = None, progress: Optional[List[Dict]] = None) -> Tuple[List[Dict], bool]:
+    """Fresh Docsify scrape returning (content, complete); see scrape_discourse_posts for ``progress``"""
+    content = [] if progress is None else progress
     known_files = [
         "README.md",
         "_sidebar.md",
@@ -193,7 +217,7 @@ def get_docsify_content() -> Tuple[List[Dict], bool]:
     
     for file in known_files:
         try:
-            response = rate_limited_get(f"{DOCSIFY_BASE}{file}")
+            response = rate_limited_get(f"{DOCSIFY_BASE}{file}", deadline=deadline)
             if response.status_code == 200:
                 last_modified = response.headers.get("Last-Modified", "")
                 if DATE_RANGES["docsify"][0] <= last_modified[:10] <= DATE_RANGES["docsify"][1]:
@@ -203,10 +227,12 @@ def get_docsify_content() -> Tuple[List[Dict], bool]:
                         "url": f"{DOCSIFY_BASE}{file}",
                         "date": last_modified
                     })
+        except DeadlineExceeded:
+            return content, False
         except Exception:
             continue
     
     if content:
         storage.save_posts(content)
         storage.set_cached_data("docsify", content)
-    return content, False
\ No newline at end of file
+    return content, True
\ No newline at end of file
@@ -17,7 +17,10 @@ class KnowledgeStorage:
             'insert_times': [],
             'cache_hits': 0,
             'cache_misses': 0,
-            'cache_operations': 0
+            'cache_operations': 0,
+            'dedup_seconds': 0.0,
+            'dedup_input': 0,
+            'dedup_kept': 0
         }
         self._init_db()
 
@@ -47,11 +50,17 @@ class KnowledgeStorage:
             content TEXT,
             url TEXT UNIQUE,
             is_solution BOOLEAN DEFAULT 0,
+            duplicate_urls TEXT DEFAULT '[]',
             created_at TEXT,
             last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
             search_text TEXT GENERATED ALWAYS AS (lower(title || ' ' || content)) VIRTUAL
         )""")
         
+        # Migrate databases created before near-duplicate tracking
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(posts)")}
+        if "duplicate_urls" not in columns:
+            conn.execute("ALTER TABLE posts ADD COLUMN duplicate_urls TEXT DEFAULT '[]'")
+        
         # Cache table
         conn.execute("""
         CREATE TABLE IF NOT EXISTS cache (
@@ -94,9 +103,25 @@ class KnowledgeStorage:
                 'operations': self.metrics['cache_operations']
             },
             'query_time_avg': sum(t['duration'] for t in self.metrics['query_times']) / max(1, len(self.metrics['query_times'])),
-            'insert_time_avg': sum(t['duration'] for t in self.metrics['insert_times']) / max(1, len(self.metrics['insert_times']))
+            'insert_time_avg': sum(t['duration'] for t in self.metrics['insert_times']) / max(1, len(self.metrics['insert_times'])),
+            'dedup': {
+                'posts_in': self.metrics['dedup_input'],
+                'posts_kept': self.metrics['dedup_kept'],
+                'dedup_ratio': 1 - self.metrics['dedup_kept'] / max(1, self.metrics['dedup_input']),
+                'throughput_posts_per_sec': self.metrics['dedup_input'] / max(1e-9, self.metrics['dedup_seconds'])
+            }
         }
 
+    def record_dedup(self, stats: Dict):
+        """Track ingest-time dedup ratio and throughput"""
+        self._log_metric('dedup_seconds', stats['duration'])
+        self._log_metric('dedup_input', stats['input'])
+        self._log_metric('dedup_kept', stats['kept'])
+        logger.info(
+            f"Dedup kept {stats['kept']}/{stats['input']} posts "
+            f"({stats['input'] / max(1e-9, stats['duration']):.0f} posts/s)"
+        )
+
     def save_posts(self, posts: List[Dict]) -> Tuple[int, float]:
         """Optimized bulk insert"""
         start = time.perf_counter()
@@ -105,8 +130,8 @@ class KnowledgeStorage:
         try:
             conn.executemany("""
             INSERT OR REPLACE INTO posts 
-            (source, external_id, title, content, url, is_solution, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            (source, external_id, title, content, url, is_solution, duplicate_urls, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """, [
                 (
                     post["source"],
@@ -115,6 +140,7 @@ class KnowledgeStorage:
                     post["content"],
                     post["url"],
                     post.get("is_solution", False),
+                    json.dumps(post.get("duplicates", [])),
                     post.get("date", datetime.now().isoformat())
                 )
                 for post in posts
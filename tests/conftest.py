@@ -0,0 +1,17 @@
+import os
+import tempfile
+import pytest
+
+os.environ.setdefault("AIPIPE_TOKEN", "test-token")
+
+
+def pytest_sessionstart(session):
+    # The app modules open knowledge.db in the working directory at import
+    # time; keep test runs away from the committed database.
+    os.chdir(tempfile.mkdtemp())
+
+
+@pytest.fixture(autouse=True)
+def no_background_scrapes(monkeypatch):
+    from app import planner
+    monkeypatch.setattr(planner, "_background_scrapes", {})
@@ -0,0 +1,79 @@
+import asyncio
+from app import admission as admission_module
+from app.admission import AdmissionController, StageLimiter, StageOverloaded, TokenBucket
+from app.deadline import DeadlineExceeded
+
+
+async def hold(limiter: StageLimiter, seconds: float):
+    async with limiter.slot():
+        await asyncio.sleep(seconds)
+        return "ran"
+
+
+async def gather_settled(*coros):
+    return await asyncio.gather(*coros, return_exceptions=True)
+
+
+def test_slot_rejects_when_queue_is_full():
+    limiter = StageLimiter("ocr", max_concurrency=1, max_queue=1, queue_timeout=1.0)
+
+    results = asyncio.run(gather_settled(*(hold(limiter, 0.05) for _ in range(4))))
+
+    assert results[:2] == ["ran", "ran"]
+    assert all(isinstance(r, StageOverloaded) for r in results[2:])
+    assert limiter.rejected_queue_full == 2
+    assert limiter.rejected_timeout == 0
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_slot_rejects_when_queue_wait_times_out():
+    limiter = StageLimiter("ai", max_concurrency=1, max_queue=4, queue_timeout=0.05)
+
+    results = asyncio.run(gather_settled(hold(limiter, 0.3), hold(limiter, 0.01)))
+
+    assert results[0] == "ran"
+    assert isinstance(results[1], StageOverloaded)
+    assert results[1].stage == "ai"
+    assert results[1].retry_after == 1
+    assert limiter.rejected_timeout == 1
+    assert limiter.snapshot()["admitted"] == 1
+
+
+def test_token_bucket_refills_and_reports_retry_after(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission_module.time, "monotonic", lambda: now[0])
+    bucket = TokenBucket(rate_per_sec=0.5, capacity=2)
+
+    assert bucket.try_acquire() == (True, 0)
+    assert bucket.try_acquire() == (True, 0)
+    assert bucket.try_acquire() == (False, 2)
+
+    now[0] += 2.0
+    assert bucket.try_acquire() == (True, 0)
+    assert bucket.try_acquire()[0] is False
+
+
+def test_quota_is_tracked_per_client(monkeypatch):
+    monkeypatch.setattr(admission_module.settings, "RATE_LIMIT_PER_MINUTE", 60.0)
+    monkeypatch.setattr(admission_module.settings, "RATE_LIMIT_BURST", 1)
+    controller = AdmissionController()
+
+    assert controller.check_quota("key:10.0.0.1")[0] is True
+    assert controller.check_quota("key:10.0.0.1")[0] is False
+    assert controller.check_quota("key:10.0.0.2")[0] is True
+    assert controller.snapshot()["quota"] == {"tracked_keys": 2, "rejections": 1}
+
+
+def test_slot_wait_cut_short_by_deadline_is_not_a_capacity_rejection():
+    limiter = StageLimiter("ocr", max_concurrency=1, max_queue=4, queue_timeout=2.0)
+
+    async def waiter():
+        await asyncio.sleep(0.01)
+        async with limiter.slot(timeout=0.05):
+            return "ran"
+
+    results = asyncio.run(gather_settled(hold(limiter, 0.3), waiter()))
+
+    assert isinstance(results[1], DeadlineExceeded)
+    assert results[1].stage == "ocr"
+    assert limiter.rejected_timeout == 0
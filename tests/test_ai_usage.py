@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.ai_usage import AIProxy
+
+
+def test_cancelling_fallback_aborts_the_in_flight_request(monkeypatch):
+    proxy = AIProxy()
+    requests = {"started": 0, "cancelled": 0}
+
+    async def slow_create(**kwargs):
+        requests["started"] += 1
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            requests["cancelled"] += 1
+            raise
+
+    monkeypatch.setattr(proxy.client.chat.completions, "create", slow_create)
+
+    async def speculate_then_cancel():
+        task = asyncio.create_task(proxy.get_fallback_answer("question"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(speculate_then_cancel())
+
+    assert requests == {"started": 1, "cancelled": 1}
+
+
+def test_fallback_passes_the_remaining_budget_as_request_timeout(monkeypatch):
+    proxy = AIProxy()
+    seen = {}
+
+    async def create(**kwargs):
+        seen.update(kwargs)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))],
+            usage=SimpleNamespace(total_tokens=1000)
+        )
+
+    monkeypatch.setattr(proxy.client.chat.completions, "create", create)
+
+    answer = asyncio.run(proxy.get_fallback_answer("question", timeout=3.5))
+
+    assert seen["timeout"] == 3.5
+    assert answer["content"] == "answer"
@@ -0,0 +1,72 @@
+import asyncio
+import time
+import pytest
+from app import deadline as deadline_module
+from app.deadline import Deadline, DeadlineExceeded
+
+
+def test_from_header_uses_default_and_clamps_to_maximum(monkeypatch):
+    monkeypatch.setattr(deadline_module.settings, "REQUEST_TIMEOUT_SECONDS", 20.0)
+    monkeypatch.setattr(deadline_module.settings, "MAX_REQUEST_TIMEOUT_SECONDS", 60.0)
+
+    assert Deadline.from_header(None).budget == 20.0
+    assert Deadline.from_header(0).budget == 20.0
+    assert Deadline.from_header(5).budget == 5
+    assert Deadline.from_header(600).budget == 60.0
+
+
+@pytest.mark.parametrize("requested", [float("nan"), float("inf"), float("-inf")])
+def test_from_header_ignores_non_finite_values(monkeypatch, requested):
+    monkeypatch.setattr(deadline_module.settings, "REQUEST_TIMEOUT_SECONDS", 20.0)
+
+    assert Deadline.from_header(requested).budget == 20.0
+
+
+def test_remaining_and_timeout_shrink_with_the_budget():
+    deadline = Deadline(0.05)
+
+    assert 0 < deadline.remaining() <= 0.05
+    assert deadline.timeout(10) <= 0.05
+    assert deadline.timeout(0.01) == 0.01
+
+    time.sleep(0.06)
+    assert deadline.expired
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("ocr")
+
+
+def test_run_returns_result_within_budget():
+    async def quick():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    assert asyncio.run(Deadline(1).run("ocr", quick())) == "done"
+
+
+def test_run_cancels_stage_that_outlives_budget():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(DeadlineExceeded) as exc:
+        asyncio.run(Deadline(0.05).run("ai", slow()))
+    assert exc.value.stage == "ai"
+    assert cancelled == [True]
+
+
+def test_run_on_expired_deadline_does_not_start_stage():
+    deadline = Deadline(0)
+    started = []
+
+    async def stage():
+        started.append(True)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(deadline.run("scrape", stage()))
+    assert started == []
@@ -0,0 +1,89 @@
+import pytest
+from app.dedup import MinHasher, deduplicate_posts
+from app.storage import KnowledgeStorage
+
+QUESTION = (
+    "How do I set up the docker container for project two on my laptop "
+    "with enough memory and the right ports exposed"
+)
+
+
+def make_post(url, content, is_solution=False, date="2024-01-01"):
+    return {
+        "source": "discourse",
+        "title": "Docker setup",
+        "content": content,
+        "url": url,
+        "is_solution": is_solution,
+        "date": date
+    }
+
+
+def test_similarity_of_identical_and_disjoint_text():
+    hasher = MinHasher()
+    sig = hasher.signature(QUESTION)
+    assert MinHasher.similarity(sig, hasher.signature(QUESTION)) == 1.0
+    other = hasher.signature("Deadline extension request for graded assignment five please")
+    assert MinHasher.similarity(sig, other) < 0.2
+
+
+def test_num_perm_must_split_evenly_into_bands():
+    with pytest.raises(ValueError):
+        MinHasher(num_perm=100, bands=16)
+
+
+def test_cluster_keeps_solution_post_and_links_duplicates():
+    posts = [
+        make_post("u1", QUESTION, date="2024-01-01"),
+        make_post("u2", QUESTION + " thanks", is_solution=True, date="2024-01-05"),
+        make_post("u3", QUESTION + " please", date="2024-01-03"),
+        make_post("u4", "Deadline extension request for graded assignment five please")
+    ]
+
+    canonical, stats = deduplicate_posts(posts)
+
+    by_url = {post["url"]: post for post in canonical}
+    assert set(by_url) == {"u2", "u4"}
+    assert sorted(by_url["u2"]["duplicates"]) == ["u1", "u3"]
+    assert by_url["u4"]["duplicates"] == []
+    assert stats["input"] == 4
+    assert stats["kept"] == 2
+
+
+def test_distinct_posts_are_all_kept():
+    posts = [make_post(f"x{i}", f"unique question {i} about topic {i * 7} here") for i in range(50)]
+
+    canonical, stats = deduplicate_posts(posts)
+
+    assert len(canonical) == 50
+    assert stats["kept"] == stats["input"] == 50
+
+
+def test_dedup_stats_are_reported_by_storage(tmp_path):
+    storage = KnowledgeStorage(str(tmp_path / "knowledge.db"))
+
+    storage.record_dedup({"input": 10, "kept": 4, "candidate_pairs": 6, "duration": 0.5})
+
+    dedup = storage.get_performance_stats()["dedup"]
+    assert dedup["posts_in"] == 10
+    assert dedup["posts_kept"] == 4
+    assert dedup["dedup_ratio"] == pytest.approx(0.6)
+    assert dedup["throughput_posts_per_sec"] == pytest.approx(20)
+
+
+def test_chained_near_duplicates_do_not_merge_transitively():
+    words = [f"w{i}" for i in range(120)]
+    a = " ".join(words[0:100])
+    b = " ".join(words[8:108])
+    c = " ".join(words[16:116])
+    hasher = MinHasher()
+    sig_a, sig_b, sig_c = (hasher.signature(text) for text in (a, b, c))
+    assert MinHasher.similarity(sig_a, sig_b) >= 0.8
+    assert MinHasher.similarity(sig_b, sig_c) >= 0.8
+    assert MinHasher.similarity(sig_a, sig_c) < 0.8
+
+    canonical, stats = deduplicate_posts([make_post("a", a), make_post("b", b), make_post("c", c)])
+
+    assert stats["kept"] == 2
+    for post in canonical:
+        assert not {post["url"], *post["duplicates"]} >= {"a", "c"}
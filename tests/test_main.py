@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from app import main, planner
+from app.admission import StageLimiter
+from app.config import settings
+
+QUESTION = {"question": "How do I install docker?"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv("API_KEY", raising=False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 10)
+    main.admission._buckets.clear()
+    post = {"title": "Cats", "content": "unrelated", "url": "u1", "is_solution": True, "date": "2024-01-01"}
+    monkeypatch.setattr(planner, "get_cached_posts", lambda source: [post] if source == "discourse" else [])
+    return TestClient(main.app)
+
+
+def full_stage(name):
+    limiter = StageLimiter(name, max_concurrency=1, max_queue=0, queue_timeout=1.0)
+    limiter.in_flight = 1
+    return limiter
+
+
+def test_wrong_api_key_is_forbidden(client, monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+
+    response = client.post("/api/", json=QUESTION, headers={"api-key": "wrong"})
+
+    assert response.status_code == 403
+
+
+def test_quota_exhaustion_returns_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 6.0)
+    main.admission._buckets.clear()
+    monkeypatch.setitem(planner.admission.stages, "ai", full_stage("ai"))
+
+    assert client.post("/api/", json=QUESTION).status_code == 200
+    response = client.post("/api/", json=QUESTION)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+
+
+def test_ocr_overload_returns_503_with_retry_after(client, monkeypatch):
+    monkeypatch.setitem(planner.admission.stages, "ocr", full_stage("ocr"))
+
+    response = client.post("/api/", json={**QUESTION, "image": "aGVsbG8="})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_ai_overload_degrades_to_local_results(client, monkeypatch):
+    monkeypatch.setitem(planner.admission.stages, "ai", full_stage("ai"))
+
+    response = client.post("/api/", json=QUESTION)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["url"] for r in body["results"]] == ["u1"]
+    assert body["metrics"]["skipped_stages"] == {"ai": "overloaded"}
+    assert body["metrics"]["partial"] is True
+
+
+def test_non_finite_timeout_header_falls_back_to_default(client, monkeypatch):
+    monkeypatch.setitem(planner.admission.stages, "ai", full_stage("ai"))
+
+    response = client.post("/api/", json=QUESTION, headers={"X-Request-Timeout": "nan"})
+
+    assert response.status_code == 200
+    assert response.json()["metrics"]["deadline_ms"] == settings.REQUEST_TIMEOUT_SECONDS * 1000
@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+import pytest
+from app import planner
+from app.admission import StageLimiter
+from app.deadline import Deadline
+
+
+@pytest.fixture
+def busy_scrape_stage(monkeypatch):
+    """A scrape limiter with no free slot and no queue room"""
+    limiter = StageLimiter("scrape", max_concurrency=1, max_queue=0, queue_timeout=0.05)
+    limiter.in_flight = 1
+    monkeypatch.setitem(planner.admission.stages, "scrape", limiter)
+    return limiter
+
+
+def test_cache_hits_bypass_the_scrape_limiter(monkeypatch, busy_scrape_stage):
+    monkeypatch.setattr(planner, "get_cached_posts", lambda source: [{"url": "cached"}])
+
+    def scrape(deadline, progress):
+        raise AssertionError("cache hit must not scrape")
+
+    posts, from_cache, complete = asyncio.run(planner.load_corpus("discourse", scrape, Deadline(1)))
+
+    assert posts == [{"url": "cached"}]
+    assert from_cache is True
+    assert complete is True
+    assert busy_scrape_stage.rejected_queue_full == 0
+
+
+def test_cold_scrape_is_limited(monkeypatch, busy_scrape_stage):
+    monkeypatch.setattr(planner, "get_cached_posts", lambda source: None)
+
+    with pytest.raises(planner.StageOverloaded):
+        asyncio.run(planner.load_corpus("discourse", lambda deadline, progress: ([], True), Deadline(1)))
+    assert busy_scrape_stage.rejected_queue_full == 1
+
+
+def test_cold_scrape_runs_once_and_outlives_the_request_deadline(monkeypatch):
+    monkeypatch.setattr(planner, "get_cached_posts", lambda source: None)
+    calls = []
+
+    def scrape(deadline, progress):
+        calls.append(deadline)
+        progress.append({"url": "first"})
+        time.sleep(0.3)
+        progress.append({"url": "second"})
+        return list(progress), True
+
+    async def two_requests_then_fill():
+        answers = await asyncio.gather(
+            planner.load_corpus("docsify", scrape, Deadline(0.1)),
+            planner.load_corpus("docsify", scrape, Deadline(0.1))
+        )
+        task, _ = planner._background_scrapes["docsify"]
+        return answers, await task
+
+    answers, filled = asyncio.run(two_requests_then_fill())
+
+    assert calls == [None]
+    assert answers == [([{"url": "first"}], False, False)] * 2
+    assert filled == ([{"url": "first"}, {"url": "second"}], True)
+
+
+@pytest.mark.parametrize("complete, skipped", [(False, {"scrape": "partial"}), (True, {})])
+def test_partial_flag_comes_from_the_scraper(monkeypatch, complete, skipped):
+    monkeypatch.setattr(planner, "get_cached_posts", lambda source: None)
+    monkeypatch.setattr(planner, "scrape_discourse_posts", lambda deadline, progress: ([], complete))
+    monkeypatch.setattr(planner, "scrape_docsify_content", lambda deadline, progress: ([], True))
+
+    async def fallback(question, context="", timeout=None):
+        return {"source": "aipipe", "content": "ai answer"}
+
+    monkeypatch.setattr(planner.ai_proxy, "get_fallback_answer", fallback)
+
+    plan = asyncio.run(planner.ExecutionPlanner("question", None, Deadline(5)).run())
+
+    assert plan["skipped_stages"] == skipped
+
+
+@pytest.fixture
+def stubbed_planner(monkeypatch):
+    """Cached corpus, a slow OCR stage and a recording AI fallback"""
+    post = {"title": "Docker", "content": "install docker", "url": "u1", "is_solution": False, "date": "2024-01-01"}
+    monkeypatch.setattr(planner, "get_cached_posts", lambda source: [post] if source == "discourse" else [])
+
+    def slow_ocr(image, timeout=None):
+        time.sleep(0.1)
+        return image
+
+    monkeypatch.setattr(planner, "extract_text_from_image", slow_ocr)
+
+    ai_calls = {"started": 0, "cancelled": 0}
+
+    ai_delay = {"seconds": 0.2}
+
+    async def fake_fallback(question, context="", timeout=None):
+        ai_calls["started"] += 1
+        try:
+            await asyncio.sleep(ai_delay["seconds"])
+        except asyncio.CancelledError:
+            ai_calls["cancelled"] += 1
+            raise
+        return {"source": "aipipe", "content": "ai answer"}
+
+    monkeypatch.setattr(planner.ai_proxy, "get_fallback_answer", fake_fallback)
+    monkeypatch.setattr(planner.ai_proxy, "min_confidence", 0.65)
+    monkeypatch.setattr(planner.settings, "SPECULATION_THRESHOLD", 0.75)
+    monkeypatch.setattr(planner, "speculation_stats", planner.SpeculationStats())
+    monkeypatch.setitem(planner.admission.stages, "ai", StageLimiter("ai", 1, 1, 1.0))
+
+    def run(early_score, final_score, ai_seconds=0.2):
+        ai_delay["seconds"] = ai_seconds
+        # The early estimate scores the bare question; the final one includes OCR text
+        monkeypatch.setattr(
+            planner.fuzz, "token_sort_ratio",
+            lambda query, text: final_score if "image context" in query else early_score
+        )
+        return asyncio.run(planner.ExecutionPlanner("question", "ocr text", Deadline(5)).run())
+
+    return run, ai_calls
+
+
+@pytest.mark.parametrize("early, final, ai_seconds, outcome, ai_started, ai_cancelled, ai_answered", [
+    (10, 10, 0.2, "hit", 1, 0, True),
+    (10, 90, 0.2, "wasted", 1, 1, False),
+    (10, 90, 0.01, "kept", 1, 0, True),
+    (90, 10, 0.2, "miss", 1, 0, True),
+    (90, 90, 0.2, "avoided", 0, 0, False),
+])
+def test_speculation_outcomes(stubbed_planner, early, final, ai_seconds, outcome, ai_started, ai_cancelled, ai_answered):
+    run, ai_calls = stubbed_planner
+
+    plan = run(early, final, ai_seconds)
+
+    assert plan["speculation"] == outcome
+    assert planner.speculation_stats.outcomes[outcome] == 1
+    assert sum(planner.speculation_stats.outcomes.values()) == 1
+    assert ai_calls == {"started": ai_started, "cancelled": ai_cancelled}
+    assert any(r["source"] == "aipipe" for r in plan["results"]) is ai_answered
+    assert planner.admission.stage("ai").in_flight == 0
+
+
+def test_speculation_rates():
+    stats = planner.SpeculationStats()
+    for outcome in ["hit", "hit", "hit", "wasted", "kept", "miss", "avoided"]:
+        stats.record(outcome)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["started"] == 5
+    assert snapshot["hit_rate"] == pytest.approx(0.6)
+    assert snapshot["waste_rate"] == pytest.approx(0.2)
+    assert snapshot["miss_rate"] == pytest.approx(0.25)
+
+
+def test_each_source_is_scored_once_per_query_off_the_event_loop(monkeypatch):
+    post = {"title": "Docker", "content": "install docker", "url": "u1", "is_solution": False, "date": "2024-01-01"}
+
+    def cached(source):
+        if source == "docsify":
+            time.sleep(0.1)  # still loading when the early estimate runs
+            return [{"text": "docker docs", "url": "d1"}]
+        return [post]
+
+    monkeypatch.setattr(planner, "get_cached_posts", cached)
+    monkeypatch.setattr(planner.settings, "SPECULATION_THRESHOLD", 0.0)
+    monkeypatch.setattr(planner.ai_proxy, "min_confidence", 0.0)
+    scored = []
+    real_score_posts = planner.score_posts
+
+    def counting_score_posts(query, source, posts):
+        scored.append((source, threading.current_thread() is threading.main_thread()))
+        return real_score_posts(query, source, posts)
+
+    monkeypatch.setattr(planner, "score_posts", counting_score_posts)
+
+    plan = asyncio.run(planner.ExecutionPlanner("install docker", None, Deadline(5)).run())
+
+    assert plan["speculation"] == "avoided"
+    assert sorted(scored) == [("discourse", False), ("docsify", False)]
@@ -0,0 +1,41 @@
+from app import scraper
+from app.deadline import Deadline, DeadlineExceeded
+
+
+class FakeResponse:
+    def __init__(self, topics):
+        self._topics = topics
+
+    def json(self):
+        return {"topic_list": {"topics": self._topics}}
+
+
+def must_not_run(*args, **kwargs):
+    raise AssertionError("partial scrape must not be deduplicated or persisted")
+
+
+def test_partial_discourse_scrape_is_returned_without_dedup_or_persisting(monkeypatch):
+    page = {
+        "title": "Docker", "excerpt": "<p>How to install docker</p>", "slug": "docker",
+        "id": 1, "created_at": "2024-03-01T10:00:00Z", "has_accepted_answer": True
+    }
+    calls = []
+
+    def fake_get(url, retries=3, deadline=None):
+        if calls:
+            raise DeadlineExceeded("scrape")
+        calls.append(url)
+        return FakeResponse([page])
+
+    monkeypatch.setattr(scraper, "DATE_RANGES", {"discourse": (
+        scraper.datetime(2023, 1, 1).date(), scraper.datetime(2025, 12, 31).date()
+    )})
+    monkeypatch.setattr(scraper, "rate_limited_get", fake_get)
+    monkeypatch.setattr(scraper, "deduplicate_posts", must_not_run)
+    monkeypatch.setattr(scraper.storage, "save_posts", must_not_run)
+
+    posts, complete = scraper.scrape_discourse_posts(Deadline(1))
+
+    assert complete is False
+    assert [post["url"] for post in posts] == [f"{scraper.DISCOURSE_URL}/t/docker/1"]
+    assert posts[0]["is_solution"] is True